@@ -10,6 +10,7 @@ from flask_restful import Resource
 from werkzeug.exceptions import Forbidden
 from libs.oauth_data_source import NotionOAuth
 from controllers.console import api
+from services.data_source_service import DataSourceService
 from ..setup import setup_required
 from ..wraps import account_initialization_required
 
@@ -42,6 +43,7 @@ class OAuthDataSource(Resource):
         if current_app.config.get('NOTION_INTEGRATION_TYPE') == 'internal':
             internal_secret = current_app.config.get('NOTION_INTERNAL_SECRET')
             oauth_provider.save_internal_access_token(internal_secret)
+            DataSourceService.invalidate_cached_bindings(current_user.current_tenant_id)
             return redirect(f'{current_app.config.get("CONSOLE_WEB_URL")}?oauth_data_source=success')
         else:
             auth_url = oauth_provider.get_authorization_url()
@@ -61,6 +63,7 @@ class OAuthDataSourceCallback(Resource):
             code = request.args.get('code')
             try:
                 oauth_provider.get_access_token(code)
+                DataSourceService.invalidate_cached_bindings(current_user.current_tenant_id)
             except requests.exceptions.HTTPError as e:
                 logging.exception(
                     f"An error occurred during the OAuthCallback process with {provider}: {e.response.text}")
@@ -88,6 +91,7 @@ class OAuthDataSourceSync(Resource):
             return {'error': 'Invalid provider'}, 400
         try:
             oauth_provider.sync_data_source(binding_id)
+            DataSourceService.invalidate_cached_bindings(current_user.current_tenant_id)
         except requests.exceptions.HTTPError as e:
             logging.exception(
                 f"An error occurred during the OAuthCallback process with {provider}: {e.response.text}")
@@ -1,10 +1,17 @@
 import datetime
-import json
+import threading
+from typing import Optional
 
+import orjson
 from cachetools import TTLCache
+from cachetools.keys import hashkey
+from celery import group
 from flask import request, current_app
 from flask_login import login_required, current_user
-from flask_restful import Resource, marshal_with, fields, reqparse, marshal
+from flask_restful import Resource
+from pydantic import BaseModel
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.dialects.postgresql import JSONB
 from werkzeug.exceptions import NotFound
 
 from controllers.console import api
@@ -13,89 +20,56 @@ from controllers.console.wraps import account_initialization_required
 from core.data_loader.loader.notion import NotionLoader
 from core.indexing_runner import IndexingRunner
 from extensions.ext_database import db
-from libs.helper import TimestampField
 from models.dataset import Document
 from models.source import DataSourceBinding
+from services.data_source_service import DataSourceService
 from services.dataset_service import DatasetService, DocumentService
+from tasks.document_indexing_sync_bulk_task import document_indexing_sync_bulk_task
 from tasks.document_indexing_sync_task import document_indexing_sync_task
 
-cache = TTLCache(maxsize=None, ttl=30)
+DOCUMENT_SYNC_BATCH_SIZE = 100
+
+# Notion page preview contents, keyed on (tenant_id, workspace_id, page_id, page_type),
+# locked like the binding caches in services.data_source_service
+preview_cache = TTLCache(maxsize=1024, ttl=300)
+preview_cache_lock = threading.Lock()
 
 
 class DataSourceApi(Resource):
-    integrate_icon_fields = {
-        'type': fields.String,
-        'url': fields.String,
-        'emoji': fields.String
-    }
-    integrate_page_fields = {
-        'page_name': fields.String,
-        'page_id': fields.String,
-        'page_icon': fields.Nested(integrate_icon_fields, allow_null=True),
-        'parent_id': fields.String,
-        'type': fields.String
-    }
-    integrate_workspace_fields = {
-        'workspace_name': fields.String,
-        'workspace_id': fields.String,
-        'workspace_icon': fields.String,
-        'pages': fields.List(fields.Nested(integrate_page_fields)),
-        'total': fields.Integer
-    }
-    integrate_fields = {
-        'id': fields.String,
-        'provider': fields.String,
-        'created_at': TimestampField,
-        'is_bound': fields.Boolean,
-        'disabled': fields.Boolean,
-        'link': fields.String,
-        'source_info': fields.Nested(integrate_workspace_fields)
-    }
-    integrate_list_fields = {
-        'data': fields.List(fields.Nested(integrate_fields)),
-    }
 
     @setup_required
     @login_required
     @account_initialization_required
-    @marshal_with(integrate_list_fields)
     def get(self):
-        # get workspace data source integrates
-        data_source_integrates = db.session.query(DataSourceBinding).filter(
-            DataSourceBinding.tenant_id == current_user.current_tenant_id,
-            DataSourceBinding.disabled == False
-        ).all()
-
+        tenant_id = current_user.current_tenant_id
         base_url = request.url_root.rstrip('/')
+        generation = DataSourceService.get_cache_generation(tenant_id)
+        cached_response = DataSourceService.get_cached_integrates_response(tenant_id, generation, base_url)
+        if cached_response:
+            return current_app.response_class(cached_response, mimetype='application/json')
+
         data_source_oauth_base_path = "/console/api/oauth/data-source"
         providers = ["notion"]
 
+        # get workspace data source integrates
+        data_source_integrates = DataSourceService.get_cached_bindings_by_provider(tenant_id, providers, generation)
+
         integrate_data = []
         for provider in providers:
-            # existing_integrate = next((ai for ai in data_source_integrates if ai.provider == provider), None)
-            existing_integrates = filter(lambda item: item.provider == provider, data_source_integrates)
-            if existing_integrates:
-                for existing_integrate in list(existing_integrates):
-                    integrate_data.append({
-                        'id': existing_integrate.id,
-                        'provider': provider,
-                        'created_at': existing_integrate.created_at,
-                        'is_bound': True,
-                        'disabled': existing_integrate.disabled,
-                        'source_info': existing_integrate.source_info,
-                        'link': f'{base_url}{data_source_oauth_base_path}/{provider}'
-                })
-            else:
+            # unbound providers are not listed, the web app treats any entry of a provider as connected
+            for existing_integrate in data_source_integrates[provider]:
                 integrate_data.append({
-                    'id': None,
+                    'id': existing_integrate.id,
                     'provider': provider,
-                    'created_at': None,
-                    'source_info': None,
-                    'is_bound': False,
-                    'disabled': None,
+                    'created_at': existing_integrate.created_at,
+                    'is_bound': True,
+                    'disabled': existing_integrate.disabled,
+                    'source_info': existing_integrate.source_info,
                     'link': f'{base_url}{data_source_oauth_base_path}/{provider}'
                 })
-        return {'data': integrate_data}, 200
+        response_data = orjson.dumps({'data': integrate_data})
+        DataSourceService.cache_integrates_response(tenant_id, generation, base_url, response_data)
+        return current_app.response_class(response_data, mimetype='application/json')
 
     @setup_required
     @login_required
@@ -103,63 +77,44 @@ class DataSourceApi(Resource):
     def patch(self, binding_id, action):
         binding_id = str(binding_id)
         action = str(action)
-        data_source_binding = DataSourceBinding.query.filter_by(
-            id=binding_id
-        ).first()
-        if data_source_binding is None:
-            raise NotFound('Data source binding not found.')
-        # enable binding
-        if action == 'enable':
-            if data_source_binding.disabled:
-                data_source_binding.disabled = False
-                data_source_binding.updated_at = datetime.datetime.utcnow()
-                db.session.add(data_source_binding)
-                db.session.commit()
-            else:
-                raise ValueError('Data source is not disabled.')
-        # disable binding
-        if action == 'disable':
-            if not data_source_binding.disabled:
-                data_source_binding.disabled = True
-                data_source_binding.updated_at = datetime.datetime.utcnow()
-                db.session.add(data_source_binding)
-                db.session.commit()
-            else:
-                raise ValueError('Data source is disabled.')
+        tenant_id = current_user.current_tenant_id
+        if action not in ['enable', 'disable']:
+            raise ValueError('Unsupported action.')
+        disabled = action == 'disable'
+        # toggle the binding only if it is in the opposite state, in a single UPDATE
+        result = db.session.execute(
+            db.update(DataSourceBinding).where(
+                DataSourceBinding.id == binding_id,
+                DataSourceBinding.tenant_id == tenant_id,
+                DataSourceBinding.disabled == (not disabled)
+            ).values(
+                disabled=disabled,
+                updated_at=datetime.datetime.utcnow()
+            )
+        )
+        db.session.commit()
+        if not result.rowcount:
+            binding_exists = db.session.query(
+                db.exists().where(
+                    DataSourceBinding.id == binding_id,
+                    DataSourceBinding.tenant_id == tenant_id
+                )
+            ).scalar()
+            if not binding_exists:
+                raise NotFound('Data source binding not found.')
+            raise ValueError('Data source is disabled.' if disabled else 'Data source is not disabled.')
+        DataSourceService.invalidate_cached_bindings(tenant_id)
         return {'result': 'success'}, 200
 
 
 class DataSourceNotionListApi(Resource):
-    integrate_icon_fields = {
-        'type': fields.String,
-        'url': fields.String,
-        'emoji': fields.String
-    }
-    integrate_page_fields = {
-        'page_name': fields.String,
-        'page_id': fields.String,
-        'page_icon': fields.Nested(integrate_icon_fields, allow_null=True),
-        'is_bound': fields.Boolean,
-        'parent_id': fields.String,
-        'type': fields.String
-    }
-    integrate_workspace_fields = {
-        'workspace_name': fields.String,
-        'workspace_id': fields.String,
-        'workspace_icon': fields.String,
-        'pages': fields.List(fields.Nested(integrate_page_fields))
-    }
-    integrate_notion_info_list_fields = {
-        'notion_info': fields.List(fields.Nested(integrate_workspace_fields)),
-    }
 
     @setup_required
     @login_required
     @account_initialization_required
-    @marshal_with(integrate_notion_info_list_fields)
     def get(self):
         dataset_id = request.args.get('dataset_id', default=None, type=str)
-        exist_page_ids = []
+        exist_page_ids = frozenset()
         # import notion in the exist dataset
         if dataset_id:
             dataset = DatasetService.get_dataset(dataset_id)
@@ -167,36 +122,31 @@ class DataSourceNotionListApi(Resource):
                 raise NotFound('Dataset not found.')
             if dataset.data_source_type != 'notion_import':
                 raise ValueError('Dataset is not notion type.')
-            documents = Document.query.filter_by(
+            # extract the page ids in the database instead of decoding every document's data_source_info
+            notion_page_ids = db.session.query(
+                db.cast(Document.data_source_info, JSONB)['notion_page_id'].astext
+            ).filter_by(
                 dataset_id=dataset_id,
                 tenant_id=current_user.current_tenant_id,
                 data_source_type='notion_import',
                 enabled=True
             ).all()
-            if documents:
-                for document in documents:
-                    data_source_info = json.loads(document.data_source_info)
-                    exist_page_ids.append(data_source_info['notion_page_id'])
+            exist_page_ids = frozenset(notion_page_id for notion_page_id, in notion_page_ids)
         # get all authorized pages
-        data_source_bindings = DataSourceBinding.query.filter_by(
-            tenant_id=current_user.current_tenant_id,
-            provider='notion',
-            disabled=False
-        ).all()
+        data_source_bindings = DataSourceService.get_cached_bindings(current_user.current_tenant_id, 'notion')
         if not data_source_bindings:
-            return {
+            return current_app.response_class(orjson.dumps({
                 'notion_info': []
-            }, 200
+            }), mimetype='application/json')
         pre_import_info_list = []
         for data_source_binding in data_source_bindings:
             source_info = data_source_binding.source_info
             pages = source_info['pages']
-            # Filter out already bound pages
-            for page in pages:
-                if page['page_id'] in exist_page_ids:
-                    page['is_bound'] = True
-                else:
-                    page['is_bound'] = False
+            # Filter out already bound pages, without mutating the JSON loaded from the binding
+            if exist_page_ids.isdisjoint(page['page_id'] for page in pages):
+                pages = [{**page, 'is_bound': False} for page in pages]
+            else:
+                pages = [{**page, 'is_bound': page['page_id'] in exist_page_ids} for page in pages]
             pre_import_info = {
                 'workspace_name': source_info['workspace_name'],
                 'workspace_icon': source_info['workspace_icon'],
@@ -204,9 +154,14 @@ class DataSourceNotionListApi(Resource):
                 'pages': pages,
             }
             pre_import_info_list.append(pre_import_info)
-        return {
+        return current_app.response_class(orjson.dumps({
             'notion_info': pre_import_info_list
-        }, 200
+        }), mimetype='application/json')
+
+
+class NotionIndexingEstimatePayload(BaseModel):
+    notion_info_list: Optional[list] = ...
+    process_rule: Optional[dict] = ...
 
 
 class DataSourceNotionApi(Resource):
@@ -215,39 +170,44 @@ class DataSourceNotionApi(Resource):
     @login_required
     @account_initialization_required
     def get(self, workspace_id, page_id, page_type):
+        tenant_id = current_user.current_tenant_id
         workspace_id = str(workspace_id)
         page_id = str(page_id)
-        data_source_binding = DataSourceBinding.query.filter(
-            db.and_(
-                DataSourceBinding.tenant_id == current_user.current_tenant_id,
-                DataSourceBinding.provider == 'notion',
-                DataSourceBinding.disabled == False,
-                DataSourceBinding.source_info['workspace_id'] == f'"{workspace_id}"'
-            )
-        ).first()
+        stmt = lambda_stmt(lambda: select(DataSourceBinding.access_token).where(
+            DataSourceBinding.tenant_id == tenant_id,
+            DataSourceBinding.provider == 'notion',
+            DataSourceBinding.disabled == False,
+            DataSourceBinding.source_info['workspace_id'].astext == workspace_id
+        ).limit(1))
+        data_source_binding = db.session.execute(stmt).first()
         if not data_source_binding:
             raise NotFound('Data source binding not found.')
 
-        loader = NotionLoader(
-            notion_access_token=data_source_binding.access_token,
-            notion_workspace_id=workspace_id,
-            notion_obj_id=page_id,
-            notion_page_type=page_type
-        )
+        cache_key = hashkey(tenant_id, workspace_id, page_id, page_type)
+        with preview_cache_lock:
+            content = preview_cache.get(cache_key)
+        if content is None:
+            loader = NotionLoader(
+                notion_access_token=data_source_binding.access_token,
+                notion_workspace_id=workspace_id,
+                notion_obj_id=page_id,
+                notion_page_type=page_type
+            )
 
-        text_docs = loader.load()
+            text_docs = loader.load()
+            content = "\n".join([doc.page_content for doc in text_docs])
+            with preview_cache_lock:
+                preview_cache[cache_key] = content
         return {
-            'content': "\n".join([doc.page_content for doc in text_docs])
+            'content': content
         }, 200
 
     @setup_required
     @login_required
     @account_initialization_required
     def post(self):
-        parser = reqparse.RequestParser()
-        parser.add_argument('notion_info_list', type=list, required=True, nullable=True, location='json')
-        parser.add_argument('process_rule', type=dict, required=True, nullable=True, location='json')
-        args = parser.parse_args()
+        # invalid payloads raise pydantic's ValidationError, a ValueError, and are answered with a 400
+        args = NotionIndexingEstimatePayload.parse_raw(request.get_data()).dict()
         # validate args
         DocumentService.estimate_args_validate(args)
         indexing_runner = IndexingRunner()
@@ -262,13 +222,16 @@ class DataSourceNotionDatasetSyncApi(Resource):
     @account_initialization_required
     def get(self, dataset_id):
         dataset_id_str = str(dataset_id)
-        dataset = DatasetService.get_dataset(dataset_id_str)
-        if dataset is None:
+        if not DatasetService.dataset_exists(dataset_id_str):
             raise NotFound("Dataset not found.")
 
-        documents = DocumentService.get_document_by_dataset_id(dataset_id_str)
-        for document in documents:
-            document_indexing_sync_task.delay(dataset_id_str, document.id)
+        document_ids = DocumentService.get_document_ids_by_dataset_id(dataset_id_str)
+        if document_ids:
+            # sync the documents in bulk tasks of at most DOCUMENT_SYNC_BATCH_SIZE documents, published as one group
+            group(
+                document_indexing_sync_bulk_task.s(dataset_id_str, document_ids[i:i + DOCUMENT_SYNC_BATCH_SIZE])
+                for i in range(0, len(document_ids), DOCUMENT_SYNC_BATCH_SIZE)
+            ).apply_async()
         return 200
 
 
@@ -280,12 +243,10 @@ class DataSourceNotionDocumentSyncApi(Resource):
     def get(self, dataset_id, document_id):
         dataset_id_str = str(dataset_id)
         document_id_str = str(document_id)
-        dataset = DatasetService.get_dataset(dataset_id_str)
-        if dataset is None:
+        if not DatasetService.dataset_exists(dataset_id_str):
             raise NotFound("Dataset not found.")
 
-        document = DocumentService.get_document(dataset_id_str, document_id_str)
-        if document is None:
+        if not DocumentService.document_exists(dataset_id_str, document_id_str):
             raise NotFound("Document not found.")
         document_indexing_sync_task.delay(dataset_id_str, document_id_str)
         return 200
@@ -1,8 +1,10 @@
 import json
 import logging
+from http.cookiejar import DefaultCookiePolicy
 from typing import List, Dict, Any, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 from flask import current_app
 from langchain.document_loaders.base import BaseLoader
 from langchain.schema import Document
@@ -20,6 +22,12 @@ RETRIEVE_PAGE_URL_TMPL = "https://api.notion.com/v1/pages/{page_id}"
 RETRIEVE_DATABASE_URL_TMPL = "https://api.notion.com/v1/databases/{database_id}"
 HEADING_TYPE = ['heading_1', 'heading_2', 'heading_3']
 
+# shared by the loaders of a process so connections to api.notion.com are kept alive between requests
+notion_session = requests.Session()
+notion_session.mount('https://', HTTPAdapter(pool_maxsize=32))
+# never store cookies, they would otherwise be sent along with the access tokens of other tenants
+notion_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
 
 class NotionLoader(BaseLoader):
     def __init__(
@@ -28,9 +36,11 @@ class NotionLoader(BaseLoader):
             notion_workspace_id: str,
             notion_obj_id: str,
             notion_page_type: str,
-            document_model: Optional[DocumentModel] = None
+            document_model: Optional[DocumentModel] = None,
+            session: Optional[requests.Session] = None
     ):
         self._document_model = document_model
+        self._session = session or notion_session
         self._notion_workspace_id = notion_workspace_id
         self._notion_obj_id = notion_obj_id
         self._notion_page_type = notion_page_type
@@ -96,7 +106,7 @@ class NotionLoader(BaseLoader):
             self, database_id: str, query_dict: Dict[str, Any] = {}
     ) -> List[Document]:
         """Get all the pages from a Notion database."""
-        res = requests.post(
+        res = self._session.post(
             DATABASE_URL_TMPL.format(database_id=database_id),
             headers={
                 "Authorization": "Bearer " + self._notion_access_token,
@@ -155,7 +165,7 @@ class NotionLoader(BaseLoader):
             block_url = BLOCK_CHILD_URL_TMPL.format(block_id=cur_block_id)
             query_dict: Dict[str, Any] = {}
 
-            res = requests.request(
+            res = self._session.request(
                 "GET",
                 block_url,
                 headers={
@@ -217,7 +227,7 @@ class NotionLoader(BaseLoader):
             block_url = BLOCK_CHILD_URL_TMPL.format(block_id=cur_block_id)
             query_dict: Dict[str, Any] = {}
 
-            res = requests.request(
+            res = self._session.request(
                 "GET",
                 block_url,
                 headers={
@@ -281,7 +291,7 @@ class NotionLoader(BaseLoader):
             block_url = BLOCK_CHILD_URL_TMPL.format(block_id=cur_block_id)
             query_dict: Dict[str, Any] = {}
 
-            res = requests.request(
+            res = self._session.request(
                 "GET",
                 block_url,
                 headers={
@@ -347,7 +357,7 @@ class NotionLoader(BaseLoader):
 
         query_dict: Dict[str, Any] = {}
 
-        res = requests.request(
+        res = self._session.request(
             "GET",
             retrieve_page_url,
             headers={
@@ -368,7 +378,7 @@ class NotionLoader(BaseLoader):
                 DataSourceBinding.tenant_id == tenant_id,
                 DataSourceBinding.provider == 'notion',
                 DataSourceBinding.disabled == False,
-                DataSourceBinding.source_info['workspace_id'] == f'"{notion_workspace_id}"'
+                DataSourceBinding.source_info['workspace_id'].astext == notion_workspace_id
             )
         ).first()
 
@@ -308,7 +308,7 @@ class IndexingRunner:
                     DataSourceBinding.tenant_id == current_user.current_tenant_id,
                     DataSourceBinding.provider == 'notion',
                     DataSourceBinding.disabled == False,
-                    DataSourceBinding.source_info['workspace_id'] == f'"{workspace_id}"'
+                    DataSourceBinding.source_info['workspace_id'].astext == workspace_id
                 )
             ).first()
             if not data_source_binding:
@@ -0,0 +1,35 @@
+"""add tenant provider and workspace id indexes to data source bindings
+
+Revision ID: c71211c8f604
+Revises: 5022897aaceb
+Create Date: 2023-08-14 10:12:45.218447
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71211c8f604'
+down_revision = '5022897aaceb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('source_binding_tenant_provider_active_idx', 'data_source_bindings',
+                        ['tenant_id', 'provider'], unique=False,
+                        postgresql_where=sa.text('disabled = false'), postgresql_concurrently=True)
+        op.create_index('source_binding_workspace_id_idx', 'data_source_bindings',
+                        [sa.text("(source_info->>'workspace_id')")], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('source_binding_workspace_id_idx', table_name='data_source_bindings',
+                      postgresql_concurrently=True)
+        op.drop_index('source_binding_tenant_provider_active_idx', table_name='data_source_bindings',
+                      postgresql_concurrently=True)
@@ -8,6 +8,9 @@ class DataSourceBinding(db.Model):
     __table_args__ = (
         db.PrimaryKeyConstraint('id', name='source_binding_pkey'),
         db.Index('source_binding_tenant_id_idx', 'tenant_id'),
+        db.Index('source_binding_tenant_provider_active_idx', 'tenant_id', 'provider',
+                 postgresql_where=db.text('disabled = false')),
+        db.Index('source_binding_workspace_id_idx', db.text("(source_info->>'workspace_id')")),
         db.Index('source_info_idx', "source_info", postgresql_using='gin')
     )
 
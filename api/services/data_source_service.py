@@ -0,0 +1,116 @@
+import threading
+from collections import namedtuple, defaultdict
+from typing import List, Dict, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import lambda_stmt, select
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.source import DataSourceBinding
+
+DataSourceBindingInfo = namedtuple('DataSourceBindingInfo', ['id', 'provider', 'created_at', 'disabled', 'source_info'])
+
+# enabled bindings, keyed on (tenant_id, provider, generation)
+binding_cache = TTLCache(maxsize=10000, ttl=30)
+binding_cache_lock = threading.Lock()
+# serialized /data-source/integrates responses as a (generation, base_url, body) tuple per tenant_id
+integrates_response_cache = TTLCache(maxsize=4096, ttl=30)
+integrates_response_cache_lock = threading.Lock()
+
+# The caches above live in the memory of each worker process and are guarded by locks, as SERVER_WORKER_CLASS
+# may select threaded workers. Entries are tagged with a per-tenant generation kept in redis, so bumping it
+# on any binding change invalidates the entries of every worker at once.
+CACHE_GENERATION_KEY = 'data_source_binding_generation:{}'
+CACHE_GENERATION_EXPIRE = 86400
+
+
+class DataSourceService:
+
+    @staticmethod
+    def get_cache_generation(tenant_id: str) -> int:
+        generation = redis_client.get(CACHE_GENERATION_KEY.format(tenant_id))
+        return int(generation) if generation else 0
+
+    @staticmethod
+    def get_cached_bindings(tenant_id: str, provider: str = 'notion') -> List[DataSourceBindingInfo]:
+        """
+        Get the enabled data source bindings of a tenant, cached for a short period.
+        Access tokens are deliberately not cached.
+        """
+        return DataSourceService.get_cached_bindings_by_provider(tenant_id, [provider])[provider]
+
+    @staticmethod
+    def get_cached_bindings_by_provider(tenant_id: str, providers: List[str],
+                                        generation: Optional[int] = None) -> Dict[str, List[DataSourceBindingInfo]]:
+        # the generation must be read before the bindings are loaded, so a concurrent change never
+        # leaves stale bindings under the current generation
+        if generation is None:
+            generation = DataSourceService.get_cache_generation(tenant_id)
+
+        bindings_by_provider = {}
+        missing_providers = []
+        with binding_cache_lock:
+            for provider in providers:
+                bindings = binding_cache.get((tenant_id, provider, generation))
+                if bindings is None:
+                    missing_providers.append(provider)
+                else:
+                    bindings_by_provider[provider] = bindings
+
+        if missing_providers:
+            # load all the uncached providers in a single query, selecting only the cached columns
+            # the lambda statement is compiled once and cached, only the bound parameters change between calls
+            stmt = lambda_stmt(lambda: select(
+                DataSourceBinding.id,
+                DataSourceBinding.provider,
+                DataSourceBinding.created_at,
+                DataSourceBinding.disabled,
+                DataSourceBinding.source_info
+            ).where(
+                DataSourceBinding.tenant_id == tenant_id,
+                DataSourceBinding.provider.in_(missing_providers),
+                DataSourceBinding.disabled == False
+            ))
+            data_source_bindings = db.session.execute(stmt).all()
+            missing_bindings = defaultdict(list)
+            for binding in data_source_bindings:
+                missing_bindings[binding.provider].append(DataSourceBindingInfo(
+                    id=binding.id,
+                    provider=binding.provider,
+                    # converted once per cache fill instead of on every response
+                    created_at=int(binding.created_at.timestamp()) if binding.created_at else None,
+                    disabled=binding.disabled,
+                    source_info=binding.source_info
+                ))
+            with binding_cache_lock:
+                for provider in missing_providers:
+                    bindings_by_provider[provider] = binding_cache[(tenant_id, provider, generation)] = \
+                        missing_bindings[provider]
+
+        return bindings_by_provider
+
+    @staticmethod
+    def get_cached_integrates_response(tenant_id: str, generation: int, base_url: str) -> Optional[bytes]:
+        with integrates_response_cache_lock:
+            cached_response = integrates_response_cache.get(tenant_id)
+        # a response of another generation or rendered for another base_url is a miss,
+        # so one entry per tenant is kept at most
+        if cached_response and cached_response[0] == generation and cached_response[1] == base_url:
+            return cached_response[2]
+        return None
+
+    @staticmethod
+    def cache_integrates_response(tenant_id: str, generation: int, base_url: str, response_data: bytes):
+        with integrates_response_cache_lock:
+            integrates_response_cache[tenant_id] = (generation, base_url, response_data)
+
+    @staticmethod
+    def invalidate_cached_bindings(tenant_id: str):
+        """
+        Invalidate the cached bindings and integrate responses of a tenant in all worker processes.
+        Must be called after the change is committed.
+        """
+        generation_key = CACHE_GENERATION_KEY.format(tenant_id)
+        redis_client.incr(generation_key)
+        redis_client.expire(generation_key, CACHE_GENERATION_EXPIRE)
@@ -108,6 +108,12 @@ class DatasetService:
         else:
             return dataset
 
+    @staticmethod
+    def dataset_exists(dataset_id: str) -> bool:
+        return db.session.query(
+            db.exists().where(Dataset.id == dataset_id)
+        ).scalar()
+
     @staticmethod
     def update_dataset(dataset_id, data, user):
         dataset = DatasetService.get_dataset(dataset_id)
@@ -290,6 +296,15 @@ class DocumentService:
 
         return document
 
+    @staticmethod
+    def document_exists(dataset_id: str, document_id: str) -> bool:
+        return db.session.query(
+            db.exists().where(
+                Document.id == document_id,
+                Document.dataset_id == dataset_id
+            )
+        ).scalar()
+
     @staticmethod
     def get_document_by_id(document_id: str) -> Optional[Document]:
         document = db.session.query(Document).filter(
@@ -307,6 +322,15 @@ class DocumentService:
 
         return documents
 
+    @staticmethod
+    def get_document_ids_by_dataset_id(dataset_id: str) -> List[str]:
+        document_ids = db.session.query(Document.id).filter(
+            Document.dataset_id == dataset_id,
+            Document.enabled == True
+        ).all()
+
+        return [document_id for document_id, in document_ids]
+
     @staticmethod
     def get_batch_documents(dataset_id: str, batch: str) -> List[Document]:
         documents = db.session.query(Document).filter(
@@ -479,7 +503,7 @@ class DocumentService:
                             DataSourceBinding.tenant_id == current_user.current_tenant_id,
                             DataSourceBinding.provider == 'notion',
                             DataSourceBinding.disabled == False,
-                            DataSourceBinding.source_info['workspace_id'] == f'"{workspace_id}"'
+                            DataSourceBinding.source_info['workspace_id'].astext == workspace_id
                         )
                     ).first()
                     if not data_source_binding:
@@ -608,7 +632,7 @@ class DocumentService:
                             DataSourceBinding.tenant_id == current_user.current_tenant_id,
                             DataSourceBinding.provider == 'notion',
                             DataSourceBinding.disabled == False,
-                            DataSourceBinding.source_info['workspace_id'] == f'"{workspace_id}"'
+                            DataSourceBinding.source_info['workspace_id'].astext == workspace_id
                         )
                     ).first()
                     if not data_source_binding:
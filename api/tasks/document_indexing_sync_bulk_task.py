@@ -0,0 +1,30 @@
+import logging
+import time
+
+import click
+from celery import shared_task
+
+from tasks.document_indexing_sync_task import document_indexing_sync_task
+
+
+@shared_task(queue='dataset')
+def document_indexing_sync_bulk_task(dataset_id: str, document_ids: list):
+    """
+    Async sync a batch of documents of a dataset
+    :param dataset_id:
+    :param document_ids:
+
+    Usage: document_indexing_sync_bulk_task.delay(dataset_id, document_ids)
+    """
+    logging.info(click.style('Start sync {} documents of dataset: {}'.format(len(document_ids), dataset_id), fg='green'))
+    start_at = time.perf_counter()
+
+    for document_id in document_ids:
+        try:
+            # run the single document sync in this worker, one failed document must not stop the batch
+            document_indexing_sync_task(dataset_id, document_id)
+        except Exception:
+            logging.exception("sync document {} of dataset {} failed".format(document_id, dataset_id))
+
+    end_at = time.perf_counter()
+    logging.info(click.style('Synced documents of dataset: {} latency: {}'.format(dataset_id, end_at - start_at), fg='green'))
@@ -48,7 +48,7 @@ def document_indexing_sync_task(dataset_id: str, document_id: str):
                 DataSourceBinding.tenant_id == document.tenant_id,
                 DataSourceBinding.provider == 'notion',
                 DataSourceBinding.disabled == False,
-                DataSourceBinding.source_info['workspace_id'] == f'"{workspace_id}"'
+                DataSourceBinding.source_info['workspace_id'].astext == workspace_id
             )
         ).first()
         if not data_source_binding: